@@ -5,94 +5,98 @@
 import logging
 import numpy as np
 import pandas as pd
-from config import ANALYSIS_PARAMS
+from config import ANALYSIS_PARAMS, SIGNAL_PARAMS
 
 logger = logging.getLogger(__name__)
 
+# 指数平滑の係数 alpha = 2 / (span + 1)
+_ALPHA_MACD_FAST = 2.0 / (ANALYSIS_PARAMS["macd_fast"] + 1.0)
+_ALPHA_MACD_SLOW = 2.0 / (ANALYSIS_PARAMS["macd_slow"] + 1.0)
+_ALPHA_MACD_SIGNAL = 2.0 / (ANALYSIS_PARAMS["macd_signal"] + 1.0)
+_RSI_DECAY = 1.0 - 1.0 / ANALYSIS_PARAMS["rsi_period"]
 
-def calculate_sma(series: pd.Series, period: int) -> pd.Series:
-    """単純移動平均線"""
-    return series.rolling(window=period, min_periods=1).mean()
+# 総合スコアの重み（ma_cross, rsi, macd, bb, volume, price_momentum の順）
+_SIGNAL_WEIGHTS = (
+    SIGNAL_PARAMS["weight_ma_cross"],
+    SIGNAL_PARAMS["weight_rsi"],
+    SIGNAL_PARAMS["weight_macd"],
+    SIGNAL_PARAMS["weight_bb"],
+    SIGNAL_PARAMS["weight_volume"],
+    SIGNAL_PARAMS["weight_price_momentum"],
+)
 
 
-def calculate_ema(series: pd.Series, period: int) -> pd.Series:
-    """指数移動平均線"""
-    return series.ewm(span=period, adjust=False).mean()
-
-
-def calculate_rsi(series: pd.Series, period: int = None) -> pd.Series:
-    """RSI (Relative Strength Index)"""
-    if period is None:
-        period = ANALYSIS_PARAMS["rsi_period"]
-
-    delta = series.diff()
-    gain = delta.where(delta > 0, 0.0)
-    loss = (-delta).where(delta < 0, 0.0)
-
-    avg_gain = gain.ewm(com=period - 1, min_periods=period).mean()
-    avg_loss = loss.ewm(com=period - 1, min_periods=period).mean()
-
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-
-def calculate_macd(series: pd.Series) -> tuple[pd.Series, pd.Series, pd.Series]:
+def analyze_stock(df: pd.DataFrame) -> dict:
     """
-    MACD (Moving Average Convergence Divergence)
+    1銘柄の包括的テクニカル分析を行う
+
+    Args:
+        df: 株価データ（Open, High, Low, Close, Volume列を含む）
 
     Returns:
-        (macd_line, signal_line, histogram)
+        分析結果の辞書
     """
-    fast = ANALYSIS_PARAMS["macd_fast"]
-    slow = ANALYSIS_PARAMS["macd_slow"]
-    signal = ANALYSIS_PARAMS["macd_signal"]
-
-    ema_fast = calculate_ema(series, fast)
-    ema_slow = calculate_ema(series, slow)
-
-    macd_line = ema_fast - ema_slow
-    signal_line = calculate_ema(macd_line, signal)
-    histogram = macd_line - signal_line
+    if df is None or df.empty:
+        return {"error": "データ不足"}
 
-    return macd_line, signal_line, histogram
+    close = df["Close"].to_numpy(dtype=np.float64, copy=False)
+    volume = df["Volume"].to_numpy(dtype=np.float64, copy=False)
+    return analyze_stock_np(close, volume)
 
 
-def calculate_bollinger_bands(series: pd.Series) -> tuple[pd.Series, pd.Series, pd.Series]:
+def analyze_stock_np(close: np.ndarray, volume: np.ndarray) -> dict:
     """
-    ボリンジャーバンド
+    終値・出来高のnumpy配列から1銘柄のテクニカル分析を行う
+
+    Args:
+        close: 終値（float64）
+        volume: 出来高（float64）
 
     Returns:
-        (upper_band, middle_band, lower_band)
+        分析結果の辞書
     """
-    period = ANALYSIS_PARAMS["bb_period"]
-    std_dev = ANALYSIS_PARAMS["bb_std"]
+    if close.size < 5:
+        return {"error": "データ不足"}
 
-    middle = calculate_sma(series, period)
-    rolling_std = series.rolling(window=period, min_periods=1).std()
+    # 最終足の出来高が0（休場日・時間外の未確定足）なら指標を計算せずHOLDとする
+    if volume[-1] == 0:
+        return _no_trade_result(float(close[-1]))
 
-    upper = middle + (rolling_std * std_dev)
-    lower = middle - (rolling_std * std_dev)
+    # 一括分析と同じ計算を1行の行列に対して行う
+    indicators, avg_volumes = _batch_indicators(close[None, :], volume[None, :])
 
-    return upper, middle, lower
+    prev_price, current_price = close[-2:].tolist()
+    return _build_result(current_price, prev_price, close.size,
+                         tuple(indicators[0].tolist()), float(volume[-1]), float(avg_volumes[0]))
 
 
-def analyze_stock(df: pd.DataFrame) -> dict:
-    """
-    1銘柄の包括的テクニカル分析を行う
+def _no_trade_result(current_price: float) -> dict:
+    """最終足に約定がない場合の分析結果（シグナルなしのHOLD）"""
+    return {
+        "current_price": current_price,
+        "signals": {},
+        "indicators": {},
+        "score": 0.0,
+        "action": "HOLD",
+    }
 
-    Args:
-        df: 株価データ（Open, High, Low, Close, Volume列を含む）
 
-    Returns:
-        分析結果の辞書
+def _build_result(current_price: float, prev_price: float, n_bars: int,
+                  indicators: tuple, current_vol: float, avg_vol: float) -> dict:
     """
-    if df is None or df.empty or len(df) < 5:
-        return {"error": "データ不足"}
+    指標の最終値からシグナルと総合スコアを判定する
 
-    close = df["Close"]
-    volume = df["Volume"]
-    current_price = float(close.iloc[-1])
+    Args:
+        current_price: 最新の終値
+        prev_price: 1本前の終値
+        n_bars: 足の本数
+        indicators: _batch_indicators の1行と同じ並びの指標値
+        current_vol: 最新の出来高
+        avg_vol: 出来高の移動平均
+    """
+    (curr_short, curr_medium, sma_long, prev_short, prev_medium,
+     current_rsi, macd_line, signal_line, curr_hist, prev_hist,
+     bb_middle, bb_std) = indicators
 
     result = {
         "current_price": current_price,
@@ -102,36 +106,25 @@ def analyze_stock(df: pd.DataFrame) -> dict:
     }
 
     # --- 移動平均線分析 ---
-    sma_short = calculate_sma(close, ANALYSIS_PARAMS["sma_short"])
-    sma_medium = calculate_sma(close, ANALYSIS_PARAMS["sma_medium"])
-    sma_long = calculate_sma(close, ANALYSIS_PARAMS["sma_long"])
-
-    result["indicators"]["sma_short"] = float(sma_short.iloc[-1])
-    result["indicators"]["sma_medium"] = float(sma_medium.iloc[-1])
-    result["indicators"]["sma_long"] = float(sma_long.iloc[-1]) if len(df) >= ANALYSIS_PARAMS["sma_long"] else None
+    result["indicators"]["sma_short"] = curr_short
+    result["indicators"]["sma_medium"] = curr_medium
+    result["indicators"]["sma_long"] = sma_long if n_bars >= ANALYSIS_PARAMS["sma_long"] else None
 
     # ゴールデンクロス / デッドクロス判定
+    # 今回の上下関係で先に分岐し、前回値との比較は1回だけにする
     ma_signal = 0
-    if len(sma_short) >= 2 and len(sma_medium) >= 2:
-        prev_short = float(sma_short.iloc[-2])
-        prev_medium = float(sma_medium.iloc[-2])
-        curr_short = float(sma_short.iloc[-1])
-        curr_medium = float(sma_medium.iloc[-1])
-
-        if prev_short <= prev_medium and curr_short > curr_medium:
-            ma_signal = 1  # ゴールデンクロス（買い）
-        elif prev_short >= prev_medium and curr_short < curr_medium:
+    if n_bars >= 2:
+        if curr_short > curr_medium:
+            # ゴールデンクロス（買い） / 短期が中期の上（やや強気）
+            ma_signal = 1 if prev_short <= prev_medium else 0.5
+        elif curr_short < curr_medium and prev_short >= prev_medium:
             ma_signal = -1  # デッドクロス（売り）
-        elif curr_short > curr_medium:
-            ma_signal = 0.5  # 短期が中期の上（やや強気）
         else:
             ma_signal = -0.5  # 短期が中期の下（やや弱気）
 
     result["signals"]["ma_cross"] = ma_signal
 
     # --- RSI分析 ---
-    rsi = calculate_rsi(close)
-    current_rsi = float(rsi.iloc[-1])
     result["indicators"]["rsi"] = current_rsi
 
     rsi_signal = 0
@@ -147,17 +140,12 @@ def analyze_stock(df: pd.DataFrame) -> dict:
     result["signals"]["rsi"] = rsi_signal
 
     # --- MACD分析 ---
-    macd_line, signal_line, histogram = calculate_macd(close)
-
-    result["indicators"]["macd"] = float(macd_line.iloc[-1])
-    result["indicators"]["macd_signal"] = float(signal_line.iloc[-1])
-    result["indicators"]["macd_histogram"] = float(histogram.iloc[-1])
+    result["indicators"]["macd"] = macd_line
+    result["indicators"]["macd_signal"] = signal_line
+    result["indicators"]["macd_histogram"] = curr_hist
 
     macd_signal = 0
-    if len(histogram) >= 2:
-        prev_hist = float(histogram.iloc[-2])
-        curr_hist = float(histogram.iloc[-1])
-
+    if n_bars >= 2:
         if prev_hist <= 0 and curr_hist > 0:
             macd_signal = 1  # MACDがシグナルを上抜け（買い）
         elif prev_hist >= 0 and curr_hist < 0:
@@ -170,21 +158,22 @@ def analyze_stock(df: pd.DataFrame) -> dict:
     result["signals"]["macd"] = macd_signal
 
     # --- ボリンジャーバンド分析 ---
-    bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(close)
+    bb_upper = bb_middle + bb_std * ANALYSIS_PARAMS["bb_std"]
+    bb_lower = bb_middle - bb_std * ANALYSIS_PARAMS["bb_std"]
 
-    result["indicators"]["bb_upper"] = float(bb_upper.iloc[-1])
-    result["indicators"]["bb_middle"] = float(bb_middle.iloc[-1])
-    result["indicators"]["bb_lower"] = float(bb_lower.iloc[-1])
+    result["indicators"]["bb_upper"] = bb_upper
+    result["indicators"]["bb_middle"] = bb_middle
+    result["indicators"]["bb_lower"] = bb_lower
 
     bb_signal = 0
-    bb_width = (float(bb_upper.iloc[-1]) - float(bb_lower.iloc[-1])) / float(bb_middle.iloc[-1])
+    bb_width = (bb_upper - bb_lower) / bb_middle
     result["indicators"]["bb_width"] = bb_width
 
-    if current_price <= float(bb_lower.iloc[-1]):
+    if current_price <= bb_lower:
         bb_signal = 1  # 下限バンドタッチ（買い）
-    elif current_price >= float(bb_upper.iloc[-1]):
+    elif current_price >= bb_upper:
         bb_signal = -1  # 上限バンドタッチ（売り）
-    elif current_price < float(bb_middle.iloc[-1]):
+    elif current_price < bb_middle:
         bb_signal = 0.3
     else:
         bb_signal = -0.3
@@ -192,10 +181,6 @@ def analyze_stock(df: pd.DataFrame) -> dict:
     result["signals"]["bb"] = bb_signal
 
     # --- 出来高分析 ---
-    vol_avg = volume.rolling(window=ANALYSIS_PARAMS["volume_avg_period"], min_periods=1).mean()
-    current_vol = float(volume.iloc[-1])
-    avg_vol = float(vol_avg.iloc[-1])
-
     result["indicators"]["volume"] = current_vol
     result["indicators"]["volume_avg"] = avg_vol
     vol_ratio = current_vol / avg_vol if avg_vol > 0 else 1.0
@@ -204,7 +189,7 @@ def analyze_stock(df: pd.DataFrame) -> dict:
     # 出来高急増 + 価格方向でシグナル判定
     vol_signal = 0
     if vol_ratio >= ANALYSIS_PARAMS["volume_spike_multiplier"]:
-        price_change = (current_price - float(close.iloc[-2])) / float(close.iloc[-2]) * 100 if len(close) >= 2 else 0
+        price_change = (current_price - prev_price) / prev_price * 100 if n_bars >= 2 else 0
         if price_change > 0:
             vol_signal = 0.8  # 出来高増 + 上昇 → 強い買い
         else:
@@ -213,8 +198,8 @@ def analyze_stock(df: pd.DataFrame) -> dict:
     result["signals"]["volume"] = vol_signal
 
     # --- 価格モメンタム ---
-    if len(close) >= 2:
-        price_change_pct = (current_price - float(close.iloc[-2])) / float(close.iloc[-2]) * 100
+    if n_bars >= 2:
+        price_change_pct = (current_price - prev_price) / prev_price * 100
         result["indicators"]["price_change_pct"] = price_change_pct
 
         momentum_signal = 0
@@ -227,18 +212,18 @@ def analyze_stock(df: pd.DataFrame) -> dict:
 
         result["signals"]["price_momentum"] = momentum_signal
     else:
+        momentum_signal = 0
         result["signals"]["price_momentum"] = 0
 
     # --- 総合スコア計算 ---
-    from config import SIGNAL_PARAMS
-
+    w_ma, w_rsi, w_macd, w_bb, w_vol, w_momentum = _SIGNAL_WEIGHTS
     score = (
-        result["signals"].get("ma_cross", 0) * SIGNAL_PARAMS["weight_ma_cross"]
-        + result["signals"].get("rsi", 0) * SIGNAL_PARAMS["weight_rsi"]
-        + result["signals"].get("macd", 0) * SIGNAL_PARAMS["weight_macd"]
-        + result["signals"].get("bb", 0) * SIGNAL_PARAMS["weight_bb"]
-        + result["signals"].get("volume", 0) * SIGNAL_PARAMS["weight_volume"]
-        + result["signals"].get("price_momentum", 0) * SIGNAL_PARAMS["weight_price_momentum"]
+        ma_signal * w_ma
+        + rsi_signal * w_rsi
+        + macd_signal * w_macd
+        + bb_signal * w_bb
+        + vol_signal * w_vol
+        + momentum_signal * w_momentum
     )
     result["score"] = round(score, 4)
 
@@ -251,3 +236,161 @@ def analyze_stock(df: pd.DataFrame) -> dict:
         result["action"] = "HOLD"
 
     return result
+
+
+def _window_mean(x: np.ndarray, p: int) -> np.ndarray:
+    """各行の直近p本の平均（rolling(window=p, min_periods=1).mean().iloc[-1] 相当、NaNは除く）"""
+    window = x[:, -p:]
+    count = (~np.isnan(window)).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.nansum(window, axis=1) / count
+
+
+def _window_std(x: np.ndarray, p: int, mean: np.ndarray) -> np.ndarray:
+    """各行の直近p本の標準偏差（ddof=1、NaNは除く）"""
+    window = x[:, -p:]
+    count = (~np.isnan(window)).sum(axis=1)
+    dev = window - mean[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.sqrt(np.nansum(dev * dev, axis=1) / (count - 1))
+
+
+def _ema_update(ema: np.ndarray, old_wt: np.ndarray, x: np.ndarray,
+                alpha: float) -> tuple[np.ndarray, np.ndarray]:
+    """ewm(adjust=False) の1ステップ更新を全銘柄まとめて行う（NaNは観測なしとして扱う）"""
+    has_ema = ~np.isnan(ema)
+    has_x = ~np.isnan(x)
+    old_wt = np.where(has_ema, old_wt * (1.0 - alpha), old_wt)
+    with np.errstate(invalid="ignore"):
+        blended = (old_wt * ema + alpha * x) / (old_wt + alpha)
+    ema = np.where(has_ema & has_x, blended, np.where(has_x, x, ema))
+    old_wt = np.where(has_x, 1.0, old_wt)
+    return ema, old_wt
+
+
+def _batch_indicators(closes: np.ndarray, volumes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    終値・出来高行列（行=銘柄）から指標の最終値を全銘柄まとめて求める
+    時間方向のループは指数平滑のみで、銘柄方向はnumpyの行列演算で処理する
+    NaNの足はpandasのrolling/ewmと同じく観測なしとして扱う
+
+    Returns:
+        (indicators, avg_volumes)
+        indicators は (銘柄数, 12) で、列は
+        (sma_short, sma_medium, sma_long, prev_sma_short, prev_sma_medium,
+         rsi, macd, macd_signal, macd_histogram, prev_macd_histogram,
+         bb_middle, bb_std)
+        prev_* は1本前の値
+    """
+    p_short = ANALYSIS_PARAMS["sma_short"]
+    p_medium = ANALYSIS_PARAMS["sma_medium"]
+    n = closes.shape[1]
+    out = np.empty((closes.shape[0], 12))
+
+    # 移動平均（最終足と1本前）
+    out[:, 0] = _window_mean(closes, p_short)
+    out[:, 1] = _window_mean(closes, p_medium)
+    out[:, 2] = _window_mean(closes, ANALYSIS_PARAMS["sma_long"])
+    out[:, 3] = _window_mean(closes[:, :-1], p_short)
+    out[:, 4] = _window_mean(closes[:, :-1], p_medium)
+
+    # RSI（上昇幅・下落幅の減衰重み付き平均）
+    # 平均の分母は上昇幅・下落幅で共通なので、減衰させた合計同士の比で求まる
+    diff = np.diff(closes, axis=1)
+    weights = _RSI_DECAY ** np.arange(n - 2, -1, -1)
+    with np.errstate(invalid="ignore"):
+        sum_gain = (np.where(diff > 0, diff, 0.0) * weights).sum(axis=1)
+        sum_loss = (np.where(diff < 0, -diff, 0.0) * weights).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[:, 5] = 100.0 - 100.0 / (1.0 + sum_gain / sum_loss)
+    if n < ANALYSIS_PARAMS["rsi_period"]:
+        out[:, 5] = np.nan
+
+    # MACD（時間方向のみループ）
+    ema_fast = np.full(closes.shape[0], np.nan)
+    ema_slow = ema_fast.copy()
+    ema_signal = ema_fast.copy()
+    wt_fast = np.ones_like(ema_fast)
+    wt_slow = wt_fast.copy()
+    wt_signal = wt_fast.copy()
+    prev_hist = ema_fast.copy()
+    for t in range(n):
+        x = closes[:, t]
+        ema_fast, wt_fast = _ema_update(ema_fast, wt_fast, x, _ALPHA_MACD_FAST)
+        ema_slow, wt_slow = _ema_update(ema_slow, wt_slow, x, _ALPHA_MACD_SLOW)
+        ema_signal, wt_signal = _ema_update(ema_signal, wt_signal, ema_fast - ema_slow, _ALPHA_MACD_SIGNAL)
+        if t == n - 2:
+            prev_hist = (ema_fast - ema_slow) - ema_signal
+    out[:, 6] = ema_fast - ema_slow
+    out[:, 7] = ema_signal
+    out[:, 8] = out[:, 6] - ema_signal
+    out[:, 9] = prev_hist
+
+    # ボリンジャーバンド
+    out[:, 10] = _window_mean(closes, ANALYSIS_PARAMS["bb_period"])
+    out[:, 11] = _window_std(closes, ANALYSIS_PARAMS["bb_period"], out[:, 10])
+
+    avg_volumes = _window_mean(volumes, ANALYSIS_PARAMS["volume_avg_period"])
+    return out, avg_volumes
+
+
+def analyze_stock_batch(tickers: list, closes: np.ndarray, volumes: np.ndarray) -> dict[str, dict]:
+    """
+    複数銘柄の終値・出来高行列（行=銘柄、列=日時）をまとめて分析する
+    他銘柄に合わせて埋められた足（終値・出来高ともNaN）のない銘柄は行列演算で一括計算し、
+    埋められた足のある銘柄はその足を除いて1銘柄ずつ同じ計算を行う
+
+    Returns:
+        {ticker: 分析結果の辞書}
+    """
+    results = {}
+    batch_rows = []
+    batch_tickers = []
+    padded = np.isnan(closes) & np.isnan(volumes)
+    has_padding = padded.any(axis=1)
+
+    for i, ticker in enumerate(tickers):
+        close = closes[i]
+        volume = volumes[i]
+        if has_padding[i]:
+            # 埋められた足を除いて個別に分析
+            valid = ~padded[i]
+            if valid.any():
+                results[ticker] = analyze_stock_np(close[valid], volume[valid])
+            continue
+
+        if close.size >= 5 and volume[-1] == 0:
+            results[ticker] = _no_trade_result(float(close[-1]))
+            continue
+
+        batch_rows.append(i)
+        batch_tickers.append(ticker)
+
+    if not batch_rows:
+        return results
+
+    if closes.shape[1] < 5:
+        for ticker in batch_tickers:
+            results[ticker] = {"error": "データ不足"}
+        return results
+
+    if len(batch_rows) < closes.shape[0]:
+        closes = closes[batch_rows]
+        volumes = volumes[batch_rows]
+    indicators, avg_volumes = _batch_indicators(closes, volumes)
+
+    # 行ごとの要素アクセスを避け、必要な列をまとめてPythonのfloatに変換する
+    last_closes = closes[:, -2:].tolist()
+    last_volumes = volumes[:, -1].tolist()
+    indicator_rows = indicators.tolist()
+    avg_volumes = avg_volumes.tolist()
+
+    for row, ticker in enumerate(batch_tickers):
+        prev_price, current_price = last_closes[row]
+        results[ticker] = _build_result(
+            current_price, prev_price, closes.shape[1],
+            tuple(indicator_rows[row]),
+            last_volumes[row], avg_volumes[row],
+        )
+
+    return results
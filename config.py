@@ -63,6 +63,30 @@ WATCHLIST = {
     "6367.T": "ダイキン工業",
     "6501.T": "日立製作所",
 }
+# 取引メッセージで使う銘柄の略称 {ティッカー: (略称, ...)}
+# 正式名称はそのまま照合されるため、ここには書かない
+WATCHLIST_ALIASES = {
+    "7203.T": ("トヨタ",),
+    "6758.T": ("ソニー",),
+    "6723.T": ("ルネサス",),
+    "6857.T": ("アドテスト",),
+    "8035.T": ("東エレ",),
+    "9984.T": ("ソフトバンク", "SBG"),
+    "4755.T": ("楽天",),
+    "8306.T": ("三菱UFJ", "MUFG"),
+    "8316.T": ("三井住友", "SMFG"),
+    "8411.T": ("みずほ",),
+    "8001.T": ("伊藤忠",),
+    "4519.T": ("中外",),
+    "9983.T": ("ファストリ", "ユニクロ"),
+    "5401.T": ("日鉄",),
+    "9766.T": ("コナミ",),
+    "6367.T": ("ダイキン",),
+    "6501.T": ("日立",),
+}
+# 実行中は変更しないため、ティッカー・銘柄名の並びを事前に作っておく
+WATCHLIST_TICKERS = tuple(WATCHLIST.keys())
+WATCHLIST_NAMES = tuple(WATCHLIST.values())
 
 # ===== テクニカル分析パラメータ =====
 ANALYSIS_PARAMS = {
@@ -4,10 +4,12 @@ yfinanceを使用して日本株の株価データを取得する
 パフォーマンス向上のため、yf.downloadによる一括取得を行う
 """
 import time
+import random
 import logging
 import yfinance as yf
+import numpy as np
 import pandas as pd
-from config import DATA_PARAMS, WATCHLIST
+from config import DATA_PARAMS, WATCHLIST_TICKERS
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +49,8 @@ def fetch_stock_data_batch(tickers: list, period: str = None, interval: str = No
         # 1銘柄の場合と複数銘柄の場合で構造が違う場合がある
         if len(tickers) == 1:
             ticker = tickers[0]
+            if isinstance(data.columns, pd.MultiIndex):
+                data = data[ticker]
             if not data.empty:
                 result[ticker] = data
             return result
@@ -54,21 +58,15 @@ def fetch_stock_data_batch(tickers: list, period: str = None, interval: str = No
         # 複数銘柄の場合、Top level columnがticker
         for ticker in tickers:
             try:
-                # 該当Tickerのデータを抽出
-                df = data[ticker].copy()
+                # 該当Tickerのデータを抽出（dropnaが新しいDataFrameを返すのでcopyは不要）
+                df = data[ticker].dropna(how='all')
                 # 全行NaNならデータなしとみなす
-                if df.isnull().all().all():
+                if df.empty:
                     logger.warning(f"[{ticker}] データが空（NaN）です")
                     continue
-                
-                # dropnaしてからチェック
-                df.dropna(how='all', inplace=True)
-                
-                if not df.empty:
-                    result[ticker] = df
-                else:
-                    logger.warning(f"[{ticker}] 有効なデータ行がありません")
-                    
+
+                result[ticker] = df
+
             except KeyError:
                 logger.warning(f"[{ticker}] データが含まれていません")
                 continue
@@ -83,12 +81,76 @@ def fetch_stock_data_batch(tickers: list, period: str = None, interval: str = No
 def fetch_daily_data_batch() -> dict[str, pd.DataFrame]:
     """全監視銘柄の日足データを一括取得"""
     return fetch_stock_data_batch(
-        list(WATCHLIST.keys()),
+        list(WATCHLIST_TICKERS),
         period=DATA_PARAMS["daily_period"],
         interval=DATA_PARAMS["daily_interval"]
     )
 
+def to_arrays(frames: dict[str, pd.DataFrame]) -> dict:
+    """
+    銘柄ごとのDataFrameを終値・出来高の2次元配列（行=銘柄、列=日時）にまとめる
+    日時は全銘柄の和集合に揃え、データのない足はNaNになる
+
+    Returns:
+        {"tickers": [...], "closes": ndarray(銘柄数, 本数), "volumes": ndarray(銘柄数, 本数)}
+    """
+    tickers = list(frames)
+    if not tickers:
+        return {
+            "tickers": [],
+            "closes": np.empty((0, 0)),
+            "volumes": np.empty((0, 0)),
+        }
+
+    closes = pd.concat([frames[t]["Close"] for t in tickers], axis=1, keys=tickers)
+    volumes = pd.concat([frames[t]["Volume"] for t in tickers], axis=1, keys=tickers)
+    return {
+        "tickers": tickers,
+        # 1銘柄の時系列がメモリ上で連続するように行優先で保持する
+        "closes": np.ascontiguousarray(closes.to_numpy(dtype=np.float64).T),
+        "volumes": np.ascontiguousarray(volumes.to_numpy(dtype=np.float64).T),
+    }
+
+def fetch_daily_arrays_batch() -> dict:
+    """全監視銘柄の日足の終値・出来高を2次元配列で一括取得"""
+    return to_arrays(fetch_daily_data_batch())
+
 # 古い関数（後方互換性のため残すが、推奨しない）
 def fetch_daily_data(ticker: str) -> pd.DataFrame | None:
     res = fetch_stock_data_batch([ticker])
     return res.get(ticker)
+
+def get_current_prices(tickers: list) -> dict[str, float]:
+    """
+    複数銘柄の現在値（イントラデイ足の最新終値）を一括取得
+    取得できなかった銘柄は結果に含めない
+    """
+    if not tickers:
+        return {}
+
+    # 取得できなかった銘柄だけを、指数バックオフ＋ジッターを挟んでリトライする
+    prices = {}
+    missing = list(tickers)
+    retry_count = DATA_PARAMS["retry_count"]
+    for attempt in range(retry_count):
+        frames = fetch_stock_data_batch(
+            missing,
+            period=DATA_PARAMS["intraday_period"],
+            interval=DATA_PARAMS["intraday_interval"],
+        )
+        for ticker, df in frames.items():
+            close = df["Close"].dropna()
+            if close.empty:
+                continue
+            prices[ticker] = float(close.iloc[-1])
+
+        missing = [t for t in missing if t not in prices]
+        if not missing or attempt == retry_count - 1:
+            break
+        delay = DATA_PARAMS["retry_delay"] * (2 ** attempt) + random.uniform(0, 0.5)
+        logger.warning(f"現在値の取得に失敗（{len(missing)}銘柄）、{delay:.1f}秒後にリトライ")
+        time.sleep(delay)
+
+    for ticker in missing:
+        logger.warning(f"[{ticker}] 現在値を取得できませんでした")
+    return prices
@@ -4,13 +4,21 @@
 API制限を考慮し、結果は1時間キャッシュする
 """
 import os
-import json
+import re
+import asyncio
+import hashlib
 import logging
-import feedparser
-import time
+import random
+import typing
+import aiohttp
+import orjson
+from lxml import etree
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from zoneinfo import ZoneInfo
+from urllib.parse import quote_plus
 import google.generativeai as genai
-from config import WATCHLIST
+from config import WATCHLIST_TICKERS, WATCHLIST_NAMES
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +26,54 @@ logger = logging.getLogger(__name__)
 EVENT_CACHE_FILE = os.path.join(os.path.dirname(__file__), "event_cache.json")
 CACHE_DURATION_HOURS = 1
 
+# Google News RSS
+RSS_SEARCH_URL = "https://news.google.com/rss/search"
+_RSS_URL_TEMPLATE = RSS_SEARCH_URL + "?q={}&hl=ja&gl=JP&ceid=JP:ja"
+RSS_MAX_CONCURRENCY = 6  # 同時接続数
+RSS_RETRY_COUNT = 3      # レート制限（HTTP 429）時のリトライ回数
+RSS_TIMEOUT = 10         # 秒
+RSS_ITEMS_PER_COMPANY = 3  # 1社あたりGeminiに渡すニュース件数
+
+# Geminiに渡す前の絞り込み: 見出しに材料となるキーワードを含むニュースのみ残す
+NEWS_KEYWORDS = (
+    "決算", "発表", "提携", "新製品", "上方修正", "下方修正", "業績修正",
+    "増配", "自社株買い", "TOB", "買収", "ストップ高", "ストップ安", "急騰", "暴落",
+)
+_NEWS_KEYWORD_RE = re.compile("|".join(map(re.escape, NEWS_KEYWORDS)))
+
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+_JST = ZoneInfo("Asia/Tokyo")
+
+# Gemini プロンプト（ニュース部分以外は固定）
+_PROMPT_PREFIX = """
+あなたはプロの株式アナリストです。
+以下の各企業の最近のニュースから、「今後株価上昇が期待される重要な発表やイベント（決算、新製品、提携、上方修正など）」が控えている、または期待される企業を分析してください。
+
+【分析対象ニュース】
+"""
+_PROMPT_SUFFIX = """
+
+【指示】
+上記ニュースに基づき、期待値が高い順に最大5社を選定してください。
+reasonは期待される理由やイベント内容を簡潔に、scoreは1〜10の期待度です。該当企業がなければ空リストを返してください。
+"""
+
+
+class _EventItem(typing.TypedDict):
+    """Geminiの応答スキーマ（1社分）"""
+    ticker: str
+    name: str
+    reason: str
+    score: int
+
+
+# JSONをスキーマどおりに返させ、説明文やコードブロックで出力トークンを使わせない
+_GENERATION_CONFIG = genai.GenerationConfig(
+    response_mime_type="application/json",
+    response_schema=list[_EventItem],
+    max_output_tokens=1024,
+)
+
 # Gemini API設定
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY:
@@ -25,12 +81,17 @@ if GEMINI_API_KEY:
     model = genai.GenerativeModel('gemini-2.0-flash') # または gemini-pro
 
 
-def _load_cache() -> dict | None:
-    """キャッシュを読み込む（有効期限内のみ）"""
+def _load_cache(news_hash: str = None) -> list | None:
+    """
+    キャッシュを読み込む（有効期限内のみ）
+    news_hash を指定した場合は有効期限を見ず、ニュースが前回と同じときだけ返す
+    """
     if os.path.exists(EVENT_CACHE_FILE):
         try:
-            with open(EVENT_CACHE_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(EVENT_CACHE_FILE, "rb") as f:
+                data = orjson.loads(f.read())
+                if news_hash is not None:
+                    return data["result"] if data.get("news_hash") == news_hash else None
                 timestamp = datetime.fromisoformat(data["timestamp"])
                 if datetime.now() - timestamp < timedelta(hours=CACHE_DURATION_HOURS):
                     return data["result"]
@@ -39,36 +100,78 @@ def _load_cache() -> dict | None:
     return None
 
 
-def _save_cache(result: list):
-    """結果をキャッシュ保存"""
+def _save_cache(result: list, news_hash: str = None):
+    """結果をキャッシュ保存（news_hash は分析に使ったニュースのハッシュ）"""
     try:
         data = {
             "timestamp": datetime.now().isoformat(),
+            "news_hash": news_hash,
             "result": result
         }
-        with open(EVENT_CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(EVENT_CACHE_FILE, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
     except Exception as e:
         logger.error(f"イベントキャッシュ保存エラー: {e}")
 
 
-def fetch_company_news(ticker: str, name: str) -> list:
+def _short_date(pub_date: str) -> str:
+    """RSSの日時（RFC 822形式、GMT）をプロンプト用に日本時間の月/日へ短縮する"""
+    try:
+        return f"{parsedate_to_datetime(pub_date).astimezone(_JST):%m/%d}"
+    except (TypeError, ValueError):
+        return pub_date
+
+
+async def fetch_company_news(session: aiohttp.ClientSession, sem: asyncio.Semaphore,
+                             ticker: str, name: str) -> list:
     """企業のニュースをGoogle News RSSから取得"""
     # 検索クエリ: 企業名 + (決算 OR 発表 OR 提携 OR 新製品)
     query = f"{name} (決算 OR 発表 OR 提携 OR 新製品)"
-    rss_url = f"https://news.google.com/rss/search?q={query}&hl=ja&gl=JP&ceid=JP:ja"
-    
+    url = _RSS_URL_TEMPLATE.format(quote_plus(query))
+
     try:
-        feed = feedparser.parse(rss_url)
+        async with sem:
+            for attempt in range(RSS_RETRY_COUNT):
+                async with session.get(url) as resp:
+                    status = resp.status
+                    if status == 200:
+                        content = await resp.read()
+                        break
+                if status != 429:
+                    logger.warning(f"[{name}] ニュース取得エラー: HTTP {status}")
+                    return []
+                if attempt == RSS_RETRY_COUNT - 1:
+                    logger.warning(f"[{name}] RSSのレート制限によりニュースを取得できませんでした")
+                    return []
+                # レート制限: タスクごとにずらして再試行
+                await asyncio.sleep((2 ** attempt) * random.uniform(0.5, 1.5))
+
+        root = etree.fromstring(content, _XML_PARSER)
         news_items = []
-        for entry in feed.entries[:3]: # 最新3件のみ
-            news_items.append(f"- {entry.title} ({entry.published})")
+        for item in root.iter("item"):
+            title = item.findtext("title") or ""
+            if not _NEWS_KEYWORD_RE.search(title):
+                continue
+            news_items.append(f"- {title} ({_short_date(item.findtext('pubDate', ''))})")
+            if len(news_items) >= RSS_ITEMS_PER_COMPANY: # 最新3件のみ
+                break
         return news_items
     except Exception as e:
         logger.warning(f"[{name}] ニュース取得エラー: {e}")
         return []
 
 
+async def _fetch_all_news() -> list[list]:
+    """全監視銘柄のニュースを並列取得（WATCHLISTの順で返す）"""
+    sem = asyncio.Semaphore(RSS_MAX_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=RSS_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        return await asyncio.gather(*[
+            fetch_company_news(session, sem, ticker, name)
+            for ticker, name in zip(WATCHLIST_TICKERS, WATCHLIST_NAMES)
+        ])
+
+
 def analyze_upcoming_events() -> list:
     """
     全監視銘柄のニュースを分析し、期待値の高い企業TOP5を返す
@@ -85,57 +188,37 @@ def analyze_upcoming_events() -> list:
 
     logger.info("イベント分析: 新規分析を開始します...")
     
-    all_news_text = ""
-    valid_count = 0
+    news_blocks = []
+
+    # 全銘柄のニュース収集（I/O待ちが主なので非同期で並列化）
+    all_news = asyncio.run(_fetch_all_news())
 
-    # 全銘柄のニュース収集（直列だと遅いが、頻度が低いので一旦許容。必要なら並列化）
-    # 25銘柄 * 1秒 = 25秒程度
-    for ticker, name in WATCHLIST.items():
-        news = fetch_company_news(ticker, name)
+    # 複数の企業の検索結果に同じ記事が出ることがあるため、最初の企業にだけ載せる
+    seen_news = set()
+    for ticker, name, news in zip(WATCHLIST_TICKERS, WATCHLIST_NAMES, all_news):
+        news = [line for line in news if line not in seen_news]
+        seen_news.update(news)
         if news:
-            all_news_text += f"\n【{name} ({ticker})】\n" + "\n".join(news)
-            valid_count += 1
-        time.sleep(0.5) # RSS制限回避
+            news_blocks.append(f"\n【{name} ({ticker})】\n" + "\n".join(news))
 
-    if valid_count == 0:
+    if not news_blocks:
         return []
 
-    # Gemini プロンプト
-    prompt = f"""
-あなたはプロの株式アナリストです。
-以下の各企業の最近のニュースから、「今後株価上昇が期待される重要な発表やイベント（決算、新製品、提携、上方修正など）」が控えている、または期待される企業を分析してください。
+    all_news_text = "".join(news_blocks)
 
-【分析対象ニュース】
-{all_news_text}
+    # ニュースが前回の分析時から変わっていなければGeminiを呼ばずに結果を使い回す
+    news_hash = hashlib.sha256(all_news_text.encode()).hexdigest()
+    cached_result = _load_cache(news_hash)
+    if cached_result is not None:
+        logger.info("イベント分析: ニュースに変化がないため前回の結果を使用します")
+        _save_cache(cached_result, news_hash)
+        return cached_result
 
-【指示】
-1. 上記ニュースに基づき、期待値が高い順に最大5社を選定してください。
-2. 各企業について、以下のJSON形式のリストで出力してください。Markdownのコードブロックは不要です。
-3. 該当企業がない場合は空リスト [] を返してください。
-
-出力形式:
-[
-  {{
-    "ticker": "銘柄コード",
-    "name": "企業名",
-    "reason": "期待される理由やイベント内容（簡潔に）",
-    "score": 1〜10の期待度スコア
-  }},
-  ...
-]
-"""
+    prompt = _PROMPT_PREFIX + all_news_text + _PROMPT_SUFFIX
 
     try:
-        response = model.generate_content(prompt)
-        content = response.text.strip()
-        
-        # JSON部分の抽出（Markdownなどを除去）
-        if "```json" in content:
-            content = content.replace("```json", "").replace("```", "")
-        elif "```" in content:
-            content = content.replace("```", "")
-            
-        result = json.loads(content)
+        response = model.generate_content(prompt, generation_config=_GENERATION_CONFIG)
+        result = orjson.loads(response.text)
         
         # 検証と整形
         final_result = []
@@ -144,7 +227,7 @@ def analyze_upcoming_events() -> list:
                 final_result.append(item)
         
         # 保存
-        _save_cache(final_result)
+        _save_cache(final_result, news_hash)
         logger.info(f"イベント分析完了: {len(final_result)}社選定")
         return final_result
 
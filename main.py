@@ -5,15 +5,11 @@ SBI証券 日本株リアルタイム分析ボット - メインエントリー
 import sys
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import pytz
+from zoneinfo import ZoneInfo
 
 from config import MARKET_HOURS
-import data_fetcher
-import screener
-import event_analyzer
-import notifier
-import portfolio
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,33 +18,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger("main")
 
+_JST = ZoneInfo("Asia/Tokyo")
+
+# 取引時間（0:00からの経過分）
+# 前場: 9:00 - 11:30
+_MORNING_OPEN = MARKET_HOURS["morning_open"][0] * 60 + MARKET_HOURS["morning_open"][1]
+_MORNING_CLOSE = MARKET_HOURS["morning_close"][0] * 60 + MARKET_HOURS["morning_close"][1]
+# 後場: 12:30 - 15:00
+_AFTERNOON_OPEN = MARKET_HOURS["afternoon_open"][0] * 60 + MARKET_HOURS["afternoon_open"][1]
+_AFTERNOON_CLOSE = MARKET_HOURS["afternoon_close"][0] * 60 + MARKET_HOURS["afternoon_close"][1]
+
 
 def is_market_open() -> bool:
     """東証の取引時間内かチェック（土日祝は休み）"""
-    jst = pytz.timezone("Asia/Tokyo")
-    now = datetime.now(jst)
+    now = datetime.now(_JST)
 
     # 土日は休場
     if now.weekday() >= 5:
         return False
 
-    hour, minute = now.hour, now.minute
-    current_time = hour * 60 + minute
-
-    # 前場: 9:00 - 11:30
-    morning_open = MARKET_HOURS["morning_open"][0] * 60 + MARKET_HOURS["morning_open"][1]
-    morning_close = MARKET_HOURS["morning_close"][0] * 60 + MARKET_HOURS["morning_close"][1]
-    
-    # 後場: 12:30 - 15:00
-    afternoon_open = MARKET_HOURS["afternoon_open"][0] * 60 + MARKET_HOURS["afternoon_open"][1]
-    afternoon_close = MARKET_HOURS["afternoon_close"][0] * 60 + MARKET_HOURS["afternoon_close"][1]
+    current_time = now.hour * 60 + now.minute
 
     # マージン（前後数分）を持たせるかどうか？
     # スケジュール実行なので厳密でなくてよいが、15:05とかに動いてほしくないなら厳密に。
     # ユーザー要望「東証取引時間内に必ず」
     
-    return (morning_open <= current_time <= morning_close or
-            afternoon_open <= current_time <= afternoon_close)
+    return (_MORNING_OPEN <= current_time <= _MORNING_CLOSE or
+            _AFTERNOON_OPEN <= current_time <= _AFTERNOON_CLOSE)
 
 
 def run_analysis(force: bool = False):
@@ -59,6 +55,12 @@ def run_analysis(force: bool = False):
     3. イベント分析（Geminiで期待株抽出）
     4. Discord通知
     """
+    # pandas/yfinance/Geminiなどの読み込みは重いため、取引時間外でスキップする実行では読み込まない
+    import screener
+    import event_analyzer
+    import notifier
+    import portfolio
+
     logger.info("=" * 60)
     logger.info("分析パイプライン開始")
     logger.info("=" * 60)
@@ -71,13 +73,17 @@ def run_analysis(force: bool = False):
         portfolio_summary = portfolio.get_portfolio_summary()
         logger.info(f"資産状況: ¥{portfolio_summary['total_value']:,.0f}")
 
-        # 3. テクニカル分析
-        logger.info("テクニカル分析を実行中...")
-        screening_result = screener.screen_all_stocks()
-        
-        # 4. イベント分析（ニュース＆Gemini）
-        logger.info("イベント分析を実行中...")
-        event_result = event_analyzer.analyze_upcoming_events()
+        # 3. イベント分析（ニュース＆Gemini）
+        # RSS・Geminiの応答待ちをテクニカル分析と重ねるため、別スレッドで先に開始する
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            logger.info("イベント分析を実行中...")
+            event_future = executor.submit(event_analyzer.analyze_upcoming_events)
+
+            # 4. テクニカル分析
+            logger.info("テクニカル分析を実行中...")
+            screening_result = screener.screen_all_stocks()
+
+            event_result = event_future.result()
         
         # 5. 通知
         logger.info("Discord通知を送信中...")
@@ -2,10 +2,14 @@
 Discord通知モジュール
 買い候補TOP10、ポートフォリオ状況をDiscord Webhookで通知する
 """
+import time
+import atexit
 import logging
 import requests
-from datetime import datetime
-from config import DISCORD_WEBHOOK_URL
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime, timezone
+from config import DISCORD_WEBHOOK_URL, RISK_PARAMS
 
 logger = logging.getLogger(__name__)
 
@@ -19,33 +23,75 @@ COLOR_ERROR = 0xFF0000       # 赤（エラー）
 
 FOOTER_TEXT = "SBI証券 分析ボット | NISA成長投資枠 | 元手: ¥220,000"
 
+MAX_EMBEDS_PER_MESSAGE = 10  # Discord上限: 10 embeds
+WEBHOOK_RETRY_COUNT = 3      # レート制限（HTTP 429）時のリトライ回数
+WEBHOOK_MAX_RETRY_AFTER = 30  # Retry-Afterの上限（秒）
+EMBED_FIELD_VALUE_LIMIT = 1024  # Discord上限: フィールド値の文字数
+
+# 同じ実行内の通知でTCP/TLS接続を使い回す
+# 接続エラー・5xxはアダプタで再送し、429は _send_webhook でRetry-Afterに従って再送する
+# POSTは冪等でないため、Discordが受信済みかもしれない読み取りエラーは再送しない（二重投稿防止）
+_SESSION = requests.Session()
+_SESSION.headers.update({"Content-Type": "application/json"})
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=3,
+        connect=3,
+        read=0,
+        backoff_factor=0.2,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    ),
+))
+atexit.register(_SESSION.close)
+
 
 def _send_webhook(embeds: list, content: str = None) -> bool:
-    """Discord Webhookにメッセージを送信"""
+    """
+    Discord Webhookにメッセージを送信
+    1回のPOSTに載せられるembedは10件までのため、超えた分は続けて送信する
+    """
+    if len(embeds) > MAX_EMBEDS_PER_MESSAGE:
+        ok = True
+        for i in range(0, len(embeds), MAX_EMBEDS_PER_MESSAGE):
+            chunk = embeds[i:i + MAX_EMBEDS_PER_MESSAGE]
+            ok = _send_webhook(chunk, content if i == 0 else None) and ok
+        return ok
+
     payload = {}
     if content:
         payload["content"] = content
     if embeds:
-        payload["embeds"] = embeds[:10]  # Discord上限: 10 embeds
+        payload["embeds"] = embeds
 
     try:
-        resp = requests.post(
-            DISCORD_WEBHOOK_URL,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=10,
-        )
-        if resp.status_code == 204:
-            logger.info("Discord通知を送信しました")
-            return True
-        else:
-            logger.error(f"Discord通知エラー: {resp.status_code} - {resp.text}")
-            return False
+        for attempt in range(WEBHOOK_RETRY_COUNT + 1):
+            resp = _SESSION.post(DISCORD_WEBHOOK_URL, json=payload, timeout=10)
+            if resp.status_code == 204:
+                logger.info("Discord通知を送信しました")
+                return True
+            if resp.status_code != 429 or attempt == WEBHOOK_RETRY_COUNT:
+                break
+            # レート制限: Retry-After（秒）だけ待って再送
+            retry_after = min(float(resp.headers.get("Retry-After", 2 ** attempt)), WEBHOOK_MAX_RETRY_AFTER)
+            logger.warning(f"Discordのレート制限、{retry_after:.1f}秒後に再送します")
+            time.sleep(retry_after)
+
+        logger.error(f"Discord通知エラー: {resp.status_code} - {resp.text}")
+        return False
     except Exception as e:
         logger.error(f"Discord通知の送信に失敗: {e}")
         return False
 
 
+def _utc_timestamp() -> str:
+    """Embed用のタイムスタンプ（UTC, ISO 8601）"""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
 def _format_signal_reasons_short(result: dict) -> str:
     """シグナル根拠を短い形式でフォーマット"""
     signals = result.get("signals", {})
@@ -86,32 +132,62 @@ def _format_signal_reasons_short(result: dict) -> str:
     return " | ".join(parts) if parts else "総合スコア"
 
 
+def _format_holding_line(name: str, shares: int, avg_price: float,
+                         current_price: float, pnl_pct: float) -> str:
+    """保有銘柄1行分の表示"""
+    emoji = "🟢" if pnl_pct >= 0 else "🔴"
+    return (
+        f"{emoji} **{name}** {shares}株 "
+        f"| 取得¥{avg_price:,.0f} → 現在¥{current_price:,.0f} "
+        f"| {pnl_pct:+.2f}%"
+    )
+
+
+def _join_lines_within(lines: list, limit: int) -> str:
+    """行を改行で連結する。limit文字を超える場合は行の途中で切らず、入りきる行までにする"""
+    text = "\n".join(lines)
+    if len(text) <= limit:
+        return text
+    kept = []
+    length = -1  # 先頭行には区切りの改行がつかない
+    for line in lines:
+        length += len(line) + 1
+        if length > limit:
+            break
+        kept.append(line)
+    if not kept:
+        # 1行目だけで上限を超える場合は空にせず切り詰める（空のフィールドは送れない）
+        return text[:limit]
+    return "\n".join(kept)
+
+
 def send_analysis_report(screening_result: dict, event_result: list, portfolio_summary: dict) -> bool:
     """
     メイン分析レポートを送信
     - ポートフォリオ状況
     - 買い候補TOP5（テクニカル）
     - 期待株TOP5（イベント分析）
+    保有銘柄の利確/損切りアラートも同じWebhook送信にまとめる
     """
     summary = screening_result.get("summary", {})
     # テクニカル分析はTOP5まで
     technical_candidates = screening_result.get("top_candidates", [])[:5]
+    # 同じレポート内のEmbedは同じ時刻を使う
+    timestamp = _utc_timestamp()
 
-    embeds = []
+    embeds = [
+        _build_holdings_alert_embed(alert, portfolio_summary, timestamp)
+        for alert in screening_result.get("holdings_alerts", [])
+    ]
 
     # ===== ポートフォリオ状況 Embed =====
     pnl_emoji = "📈" if portfolio_summary['total_pnl'] >= 0 else "📉"
     holdings_text = "保有銘柄なし"
     if portfolio_summary.get("holdings"):
-        holdings_lines = []
-        for h in portfolio_summary["holdings"]:
-            emoji = "🟢" if h["pnl_pct"] >= 0 else "🔴"
-            holdings_lines.append(
-                f"{emoji} **{h['name']}** {h['shares']}株 "
-                f"| 取得¥{h['avg_price']:,.0f} → 現在¥{h['current_price']:,.0f} "
-                f"| {h['pnl_pct']:+.2f}%"
-            )
-        holdings_text = "\n".join(holdings_lines)
+        holdings_text = _join_lines_within([
+            _format_holding_line(h["name"], h["shares"], h["avg_price"], h["current_price"], h["pnl_pct"])
+            for h in portfolio_summary["holdings"]
+        ], EMBED_FIELD_VALUE_LIMIT)
 
     portfolio_embed = {
         "title": f"{pnl_emoji} ポートフォリオ状況",
@@ -123,10 +199,10 @@ def send_analysis_report(screening_result: dict, event_result: list, portfolio_s
             {"name": "💰 損益", "value": f"**¥{portfolio_summary['total_pnl']:+,.0f}（{portfolio_summary['total_pnl_pct']:+.2f}%）**", "inline": True},
             {"name": "🏦 確定損益", "value": f"¥{portfolio_summary['total_realized_pnl']:+,.0f}", "inline": True},
             {"name": "📋 取引回数", "value": f"{portfolio_summary['trade_count']}回", "inline": True},
-            {"name": "📈 保有銘柄", "value": holdings_text[:1024], "inline": False},
+            {"name": "📈 保有銘柄", "value": holdings_text, "inline": False},
         ],
         "footer": {"text": FOOTER_TEXT},
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": timestamp,
     }
     embeds.append(portfolio_embed)
 
@@ -183,7 +259,7 @@ def send_analysis_report(screening_result: dict, event_result: list, portfolio_s
             "description": "\n\n".join(event_lines),
             "color": 0xFF00FF, # Magenta
             "footer": {"text": "※ニュース分析結果は1時間キャッシュされます"},
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": timestamp,
         }
         embeds.append(event_embed)
     else:
@@ -199,8 +275,8 @@ def send_analysis_report(screening_result: dict, event_result: list, portfolio_s
     return _send_webhook(embeds)
 
 
-def send_holdings_alert(alert: dict, portfolio_summary: dict) -> bool:
-    """保有銘柄の利確/損切りアラートを通知"""
+def _build_holdings_alert_embed(alert: dict, portfolio_summary: dict, timestamp: str = None) -> dict:
+    """保有銘柄の利確/損切りアラートのEmbedを作成"""
     ticker = alert.get("ticker", "")
     name = alert.get("name", ticker)
     alert_type = alert.get("alert_type", "")
@@ -217,9 +293,7 @@ def send_holdings_alert(alert: dict, portfolio_summary: dict) -> bool:
         color = COLOR_STOP_LOSS
         desc = f"損切りラインの-{RISK_PARAMS['stop_loss_pct']}%に到達。売却を検討してください。"
 
-    from config import RISK_PARAMS
-
-    embed = {
+    return {
         "title": title,
         "description": desc,
         "color": color,
@@ -232,10 +306,13 @@ def send_holdings_alert(alert: dict, portfolio_summary: dict) -> bool:
             {"name": "📊 総資産", "value": f"¥{portfolio_summary['total_value']:,.0f}", "inline": True},
         ],
         "footer": {"text": FOOTER_TEXT},
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": timestamp or _utc_timestamp(),
     }
 
-    return _send_webhook([embed])
+
+def send_holdings_alert(alert: dict, portfolio_summary: dict) -> bool:
+    """保有銘柄の利確/損切りアラートを通知"""
+    return _send_webhook([_build_holdings_alert_embed(alert, portfolio_summary)])
 
 
 def send_trade_confirmation(trade_type: str, ticker: str, name: str,
@@ -257,7 +334,7 @@ def send_trade_confirmation(trade_type: str, ticker: str, name: str,
             {"name": "📈 損益", "value": f"**¥{portfolio_summary['total_pnl']:+,.0f}（{portfolio_summary['total_pnl_pct']:+.2f}%）**", "inline": True},
         ],
         "footer": {"text": FOOTER_TEXT},
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": _utc_timestamp(),
     }
 
     return _send_webhook([embed])
@@ -269,6 +346,6 @@ def send_error_notification(error_msg: str) -> bool:
         "title": "❌ 分析ボットエラー",
         "description": f"```\n{error_msg[:2000]}\n```",
         "color": COLOR_ERROR,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": _utc_timestamp(),
     }
     return _send_webhook([embed])
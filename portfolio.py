@@ -2,22 +2,35 @@
 ポートフォリオ管理モジュール
 元手22万円の資金管理、売買履歴の追跡、現在残高の計算を行う
 """
-import json
 import os
+import copy
 import logging
+import orjson
 from datetime import datetime
 from config import INITIAL_CAPITAL, PORTFOLIO_FILE, RISK_PARAMS
 
 logger = logging.getLogger(__name__)
 
+# 読み込んだポートフォリオデータ（ファイルの更新時刻が変わるまで使い回す）
+_CACHE = {"mtime": None, "data": None}
+
 
 def _load_portfolio() -> dict:
-    """ポートフォリオデータを読み込む"""
+    """
+    ポートフォリオデータを読み込む
+    返す辞書はキャッシュと共有するため、変更する場合は _load_portfolio_for_update を使う
+    """
     if os.path.exists(PORTFOLIO_FILE):
         try:
-            with open(PORTFOLIO_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
+            mtime = os.stat(PORTFOLIO_FILE).st_mtime_ns
+            if _CACHE["mtime"] == mtime:
+                return _CACHE["data"]
+            with open(PORTFOLIO_FILE, "rb") as f:
+                data = orjson.loads(f.read())
+            _CACHE["mtime"] = mtime
+            _CACHE["data"] = data
+            return data
+        except (orjson.JSONDecodeError, IOError) as e:
             logger.error(f"ポートフォリオファイルの読み込みに失敗: {e}")
 
     # 初期データ
@@ -31,12 +44,21 @@ def _load_portfolio() -> dict:
     }
 
 
+def _load_portfolio_for_update() -> dict:
+    """変更用にポートフォリオデータのコピーを読み込む"""
+    return copy.deepcopy(_load_portfolio())
+
+
 def _save_portfolio(data: dict):
-    """ポートフォリオデータを保存する"""
+    """ポートフォリオデータを保存する（一時ファイルに書いてから置き換え、途中で落ちても壊さない）"""
     data["updated_at"] = datetime.now().isoformat()
+    tmp_path = PORTFOLIO_FILE + ".tmp"
     try:
-        with open(PORTFOLIO_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, PORTFOLIO_FILE)
+        _CACHE["mtime"] = os.stat(PORTFOLIO_FILE).st_mtime_ns
+        _CACHE["data"] = data
         logger.info("ポートフォリオデータを保存しました")
     except IOError as e:
         logger.error(f"ポートフォリオデータの保存に失敗: {e}")
@@ -44,14 +66,19 @@ def _save_portfolio(data: dict):
 
 def get_portfolio_summary() -> dict:
     """現在のポートフォリオサマリーを取得"""
+    from data_fetcher import get_current_prices
+
     portfolio = _load_portfolio()
+    holdings = portfolio.get("holdings", {})
+
+    # 保有銘柄の現在値はまとめて1回で取得する
+    current_prices = get_current_prices(list(holdings))
 
     # 保有銘柄の時価評価額を計算
     holdings_value = 0
     holdings_detail = []
-    for ticker, holding in portfolio.get("holdings", {}).items():
-        from data_fetcher import get_current_price
-        current_price = get_current_price(ticker)
+    for ticker, holding in holdings.items():
+        current_price = current_prices.get(ticker)
         if current_price:
             value = current_price * holding["shares"]
             pnl = (current_price - holding["avg_price"]) * holding["shares"]
@@ -98,13 +125,15 @@ def record_buy(ticker: str, name: str, price: float, shares: int) -> dict:
     Returns:
         更新後のポートフォリオサマリー
     """
-    portfolio = _load_portfolio()
+    portfolio = _load_portfolio_for_update()
     total_cost = price * shares
 
     if total_cost > portfolio["current_cash"]:
         logger.error(f"資金不足: 必要額 ¥{total_cost:,.0f} > 残高 ¥{portfolio['current_cash']:,.0f}")
         return {"error": "資金不足"}
 
+    now = datetime.now().isoformat()
+
     # 現金を減らす
     portfolio["current_cash"] -= total_cost
 
@@ -117,14 +146,14 @@ def record_buy(ticker: str, name: str, price: float, shares: int) -> dict:
             "name": name,
             "shares": total_shares,
             "avg_price": round(avg_price, 1),
-            "first_buy_date": existing.get("first_buy_date", datetime.now().isoformat()),
+            "first_buy_date": existing.get("first_buy_date", now),
         }
     else:
         portfolio["holdings"][ticker] = {
             "name": name,
             "shares": shares,
             "avg_price": price,
-            "first_buy_date": datetime.now().isoformat(),
+            "first_buy_date": now,
         }
 
     # 取引履歴に追加
@@ -135,7 +164,7 @@ def record_buy(ticker: str, name: str, price: float, shares: int) -> dict:
         "price": price,
         "shares": shares,
         "total": total_cost,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now,
     })
 
     _save_portfolio(portfolio)
@@ -156,7 +185,7 @@ def record_sell(ticker: str, name: str, price: float, shares: int) -> dict:
     Returns:
         更新後のポートフォリオサマリー
     """
-    portfolio = _load_portfolio()
+    portfolio = _load_portfolio_for_update()
 
     if ticker not in portfolio["holdings"]:
         logger.error(f"保有していない銘柄です: {ticker}")
@@ -170,6 +199,8 @@ def record_sell(ticker: str, name: str, price: float, shares: int) -> dict:
     total_revenue = price * shares
     realized_pnl = (price - holding["avg_price"]) * shares
 
+    now = datetime.now().isoformat()
+
     # 現金を増やす
     portfolio["current_cash"] += total_revenue
 
@@ -192,7 +223,7 @@ def record_sell(ticker: str, name: str, price: float, shares: int) -> dict:
         "shares": shares,
         "total": total_revenue,
         "realized_pnl": realized_pnl,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now,
     })
 
     _save_portfolio(portfolio)
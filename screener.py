@@ -2,13 +2,14 @@
 スクリーニング＆シグナル生成モジュール
 全銘柄を分析し、買い候補TOP10を生成する
 """
-import json
 import os
+import heapq
 import logging
+import orjson
 from datetime import datetime, timedelta
-from config import WATCHLIST, SIGNAL_PARAMS, RISK_PARAMS, SIGNAL_HISTORY_FILE
-from data_fetcher import fetch_daily_data_batch
-from analyzer import analyze_stock
+from config import WATCHLIST, WATCHLIST_TICKERS, WATCHLIST_NAMES, SIGNAL_PARAMS, RISK_PARAMS, SIGNAL_HISTORY_FILE
+from data_fetcher import fetch_daily_arrays_batch
+from analyzer import analyze_stock_batch
 from portfolio import get_available_cash, get_holdings, calculate_recommended_shares
 
 logger = logging.getLogger(__name__)
@@ -18,18 +19,20 @@ def _load_signal_history() -> dict:
     """シグナル履歴を読み込む（重複通知防止用）"""
     if os.path.exists(SIGNAL_HISTORY_FILE):
         try:
-            with open(SIGNAL_HISTORY_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
+            with open(SIGNAL_HISTORY_FILE, "rb") as f:
+                return orjson.loads(f.read())
+        except (orjson.JSONDecodeError, IOError):
             pass
     return {}
 
 
 def _save_signal_history(history: dict):
-    """シグナル履歴を保存"""
+    """シグナル履歴を保存（一時ファイルに書いてから置き換える）"""
+    tmp_path = SIGNAL_HISTORY_FILE + ".tmp"
     try:
-        with open(SIGNAL_HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(history, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, SIGNAL_HISTORY_FILE)
     except IOError as e:
         logger.error(f"シグナル履歴の保存に失敗: {e}")
 
@@ -116,7 +119,6 @@ def screen_all_stocks() -> dict:
             "all_results": {...},
         }
     """
-    signal_history = _load_signal_history()
     holdings = get_holdings()
     available_cash = get_available_cash()
 
@@ -127,16 +129,17 @@ def screen_all_stocks() -> dict:
     logger.info(f"スクリーニング開始: {len(WATCHLIST)}銘柄, 利用可能残高: ¥{available_cash:,.0f}")
 
     # 一括データ取得（高速化・API制限対策）
-    all_stock_data = fetch_daily_data_batch()
+    # 終値・出来高は行=銘柄の2次元配列で受け取り、全銘柄まとめて分析する
+    stock_arrays = fetch_daily_arrays_batch()
+    analyzed = analyze_stock_batch(stock_arrays["tickers"], stock_arrays["closes"], stock_arrays["volumes"])
 
-    for ticker, name in WATCHLIST.items():
+    for ticker, name in zip(WATCHLIST_TICKERS, WATCHLIST_NAMES):
         try:
-            df = all_stock_data.get(ticker)
-            if df is None or df.empty:
+            result = analyzed.get(ticker)
+            if result is None:
                 # logger.warning(f"[{ticker}] {name}: データ取得失敗、スキップ") # ログ多すぎるので省略
                 continue
 
-            result = analyze_stock(df)
             if "error" in result:
                 logger.warning(f"[{ticker}] {name}: 分析エラー: {result['error']}")
                 continue
@@ -171,24 +174,36 @@ def screen_all_stocks() -> dict:
                 # 未保有の銘柄のみ買い候補として評価
                 # スコアがプラスの銘柄のみ（危険な株=マイナススコアは除外）
                 if score > 0:
-                    buy_info = determine_buy_method(current_price, available_cash)
-                    oco = calculate_oco_levels(current_price)
-                    all_candidates.append({
-                        **result,
-                        **buy_info,
-                        "oco": oco,
-                    })
+                    all_candidates.append(result)
 
         except Exception as e:
             logger.error(f"[{ticker}] {name}: スクリーニングエラー: {e}")
             continue
 
-    # スコア上位10社を買い候補として選出
-    all_candidates.sort(key=lambda x: x["score"], reverse=True)
-    top_candidates = all_candidates[:10]
-
-    # シグナル履歴を保存
-    _save_signal_history(signal_history)
+    # 5分ごとの実行で同じアラートが続かないよう、6時間以内に通知済みのものは除く
+    # 履歴の読み書きはアラートがあるときだけ行う
+    if holdings_alerts:
+        signal_history = _load_signal_history()
+        new_alerts = []
+        for alert in holdings_alerts:
+            if _is_duplicate_signal(alert["ticker"], alert["alert_type"], signal_history):
+                continue
+            _record_signal(alert["ticker"], alert["alert_type"], signal_history)
+            new_alerts.append(alert)
+        if new_alerts:
+            _save_signal_history(signal_history)
+        holdings_alerts = new_alerts
+
+    # スコア上位10社を買い候補として選出（同点はWATCHLIST順）
+    # 購入方法・OCOラインは選出された銘柄の分だけ計算する
+    top_candidates = []
+    for result in heapq.nlargest(10, all_candidates, key=lambda x: x["score"]):
+        current_price = result.get("current_price", 0)
+        top_candidates.append({
+            **result,
+            **determine_buy_method(current_price, available_cash),
+            "oco": calculate_oco_levels(current_price),
+        })
 
     summary = {
         "total_screened": len(WATCHLIST),
@@ -0,0 +1,102 @@
+"""
+取引メッセージ解析の参照実装（テスト用）
+正規表現の事前コンパイルや銘柄名の一括照合を入れる前の parse_trade_message をそのまま残し、結果の比較に使う
+銘柄名の先頭一致は略称（WATCHLIST_ALIASES）に置き換えたため、名前の対応表は trade_parser のものを共有する
+"""
+import re
+from config import WATCHLIST
+from trade_parser import NAME_TO_TICKER, TICKER_SHORT_TO_FULL
+
+
+def parse_trade_message(message: str) -> dict | None:
+    """
+    取引メッセージを解析する
+
+    Args:
+        message: Discord メッセージ文字列
+
+    Returns:
+        {"ticker": str, "name": str, "price": float, "shares": int, "trade_type": "BUY"|"SELL"}
+        解析失敗時は None
+    """
+    message = message.strip()
+    if not message:
+        return None
+
+    # 取引タイプ判定
+    trade_type = None
+    buy_keywords = ["購入", "買い", "買った", "買う", "購入した"]
+    sell_keywords = ["売却", "売り", "売った", "売る", "売却した"]
+
+    for keyword in buy_keywords:
+        if keyword in message:
+            trade_type = "BUY"
+            break
+    if trade_type is None:
+        for keyword in sell_keywords:
+            if keyword in message:
+                trade_type = "SELL"
+                break
+    if trade_type is None:
+        return None  # 取引関連メッセージではない
+
+    # 価格の抽出（"2500円", "¥2500", "2,500円" など）
+    price_patterns = [
+        r'[¥￥]?\s*([\d,]+(?:\.\d+)?)\s*円',
+        r'[¥￥]\s*([\d,]+(?:\.\d+)?)',
+        r'@\s*([\d,]+(?:\.\d+)?)',
+    ]
+    price = None
+    for pattern in price_patterns:
+        match = re.search(pattern, message)
+        if match:
+            price = float(match.group(1).replace(",", ""))
+            break
+
+    if price is None or price <= 0:
+        return None
+
+    # 株数の抽出（"100株", "100" など）
+    shares = 1  # デフォルト1株（S株対応）
+    shares_patterns = [
+        r'(\d+)\s*株',
+        r'(\d+)\s*(?:株|かぶ)',
+    ]
+    for pattern in shares_patterns:
+        match = re.search(pattern, message)
+        if match:
+            shares = int(match.group(1))
+            break
+
+    # 銘柄の特定
+    ticker = None
+    name = None
+
+    # まずティッカーコードで検索（"7203.T", "7203" など）
+    ticker_match = re.search(r'(\d{4})(?:\.T)?', message)
+    if ticker_match:
+        short_ticker = ticker_match.group(1)
+        if short_ticker in TICKER_SHORT_TO_FULL:
+            ticker = TICKER_SHORT_TO_FULL[short_ticker]
+            name = WATCHLIST.get(ticker, ticker)
+
+    # ティッカーが見つからなければ銘柄名で検索
+    if ticker is None:
+        # 長い名前から順にマッチ（部分一致を優先）
+        sorted_names = sorted(NAME_TO_TICKER.keys(), key=len, reverse=True)
+        for candidate_name in sorted_names:
+            if candidate_name in message and len(candidate_name) >= 2:
+                ticker = NAME_TO_TICKER[candidate_name]
+                name = WATCHLIST.get(ticker, ticker)
+                break
+
+    if ticker is None:
+        return None
+
+    return {
+        "ticker": ticker,
+        "name": name,
+        "price": price,
+        "shares": shares,
+        "trade_type": trade_type,
+    }
@@ -0,0 +1,118 @@
+"""
+テクニカル分析エンジンのテスト
+"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import reference_analyzer
+from analyzer import analyze_stock, analyze_stock_batch, analyze_stock_np
+
+
+def _assert_same(expected, actual, path="result"):
+    """分析結果の辞書が完全に一致することを確認する（NaN同士は一致とみなす）"""
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys(), path
+        for key in expected:
+            _assert_same(expected[key], actual[key], f"{path}.{key}")
+    elif isinstance(expected, float) and math.isnan(expected):
+        assert isinstance(actual, float) and math.isnan(actual), path
+    else:
+        assert expected == actual, path
+
+
+def _assert_close(expected, actual, path="result"):
+    """分析結果の辞書が丸め誤差の範囲で一致することを確認する"""
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys(), path
+        for key in expected:
+            _assert_close(expected[key], actual[key], f"{path}.{key}")
+    elif isinstance(expected, float):
+        if math.isnan(expected):
+            assert math.isnan(actual), path
+        else:
+            assert actual == pytest.approx(expected, rel=1e-7, abs=1e-7), path
+    else:
+        assert expected == actual, path
+
+
+def _make_frame(n_bars: int, seed: int) -> pd.DataFrame:
+    """乱数の日足データ（seedにより出来高急増・終値の欠損を含む）"""
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)))
+    volume = rng.integers(100_000, 1_000_000, n_bars).astype(np.float64)
+    if seed % 3 == 0:
+        volume[-1] = volume[:-1].mean() * 3
+    if seed % 4 == 1:
+        close[n_bars // 2] = np.nan
+    index = pd.date_range("2026-01-05", periods=n_bars, freq="B")
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": volume},
+                        index=index)
+
+
+@pytest.mark.parametrize("n_bars", [5, 6, 14, 15, 16, 20, 25, 26, 40, 60, 75, 76, 120, 250])
+def test_matches_pandas_reference(n_bars):
+    """numpy版の分析結果は変更前のpandas実装と一致する"""
+    for seed in range(40):
+        df = _make_frame(n_bars, seed)
+        _assert_close(reference_analyzer.analyze_stock(df), analyze_stock(df), f"n={n_bars}, seed={seed}")
+
+
+@pytest.mark.parametrize("n_bars", [5, 14, 26, 76, 250])
+@pytest.mark.parametrize("shape", ["flat", "up", "down", "rounded"])
+def test_matches_pandas_reference_on_ties(n_bars, shape):
+    """値動きなし・単調・同値の多い系列でも、比較の分岐がpandas実装と一致する"""
+    if shape == "flat":
+        close = np.full(n_bars, 500.0)
+    elif shape == "up":
+        close = np.linspace(100, 200, n_bars)
+    elif shape == "down":
+        close = np.linspace(200, 100, n_bars)
+    else:
+        close = np.round(_make_frame(n_bars, 2)["Close"].to_numpy(), -1)
+    df = pd.DataFrame({"Close": close, "Volume": np.full(n_bars, 100_000.0)})
+    _assert_close(reference_analyzer.analyze_stock(df), analyze_stock(df), shape)
+
+
+def test_too_few_bars():
+    """5本未満はデータ不足"""
+    df = _make_frame(4, 0)
+    assert analyze_stock(df) == {"error": "データ不足"}
+    assert reference_analyzer.analyze_stock(df) == {"error": "データ不足"}
+
+
+def _make_matrix(n_bars: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """乱数の終値・出来高行列に、同値・単調・欠損などの境界ケースの行を加える"""
+    rng = np.random.default_rng(seed)
+    n_rows = 12
+    closes = 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_rows, n_bars)), axis=1))
+    volumes = rng.integers(100_000, 1_000_000, (n_rows, n_bars)).astype(np.float64)
+
+    closes[0] = 500.0                                  # 値動きなし
+    closes[1] = np.linspace(100, 200, n_bars)           # 単調増加
+    closes[2] = np.linspace(200, 100, n_bars)           # 単調減少
+    closes[3] = np.round(closes[3], -1)                 # 同値の足が多い
+    volumes[4, -1] = 0                                  # 最終足に約定なし
+    closes[5, n_bars // 2] = np.nan                     # 終値のみ欠損
+    closes[6, :2] = np.nan                              # 他銘柄に合わせて埋められた足
+    volumes[6, :2] = np.nan
+    volumes[7, -1] = volumes[7, :-1].mean() * 3         # 出来高急増
+    return closes, volumes
+
+
+@pytest.mark.parametrize("n_bars", [4, 5, 6, 13, 14, 15, 20, 21, 26, 27, 60, 75, 76, 250])
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_per_row(n_bars, seed):
+    """一括分析の結果は1銘柄ずつ分析した結果と完全に一致する"""
+    closes, volumes = _make_matrix(n_bars, seed)
+    tickers = [f"T{i}" for i in range(closes.shape[0])]
+
+    results = analyze_stock_batch(tickers, closes, volumes)
+
+    assert results.keys() == set(tickers)
+    for i, ticker in enumerate(tickers):
+        valid = ~(np.isnan(closes[i]) & np.isnan(volumes[i]))
+        expected = analyze_stock_np(closes[i][valid], volumes[i][valid])
+        _assert_same(expected, results[ticker], ticker)
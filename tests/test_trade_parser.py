@@ -0,0 +1,67 @@
+"""
+取引メッセージ解析のテスト
+"""
+import random
+
+import pytest
+
+import reference_trade_parser
+from config import WATCHLIST, WATCHLIST_ALIASES
+from trade_parser import parse_trade_message
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("トヨタの株を2500円で100株購入した",
+     {"ticker": "7203.T", "name": "トヨタ自動車", "price": 2500.0, "shares": 100, "trade_type": "BUY"}),
+    ("ソニーを3200円で購入",
+     {"ticker": "6758.T", "name": "ソニーグループ", "price": 3200.0, "shares": 1, "trade_type": "BUY"}),
+    ("7203.T 2500円 100株 買い",
+     {"ticker": "7203.T", "name": "トヨタ自動車", "price": 2500.0, "shares": 100, "trade_type": "BUY"}),
+    ("8306 1800円 売却",
+     {"ticker": "8306.T", "name": WATCHLIST["8306.T"], "price": 1800.0, "shares": 1, "trade_type": "SELL"}),
+    ("三菱UFJ 1850円 200株 購入",
+     {"ticker": "8306.T", "name": WATCHLIST["8306.T"], "price": 1850.0, "shares": 200, "trade_type": "BUY"}),
+    ("MUFG ¥1,850.5 で売った",
+     {"ticker": "8306.T", "name": WATCHLIST["8306.T"], "price": 1850.5, "shares": 1, "trade_type": "SELL"}),
+])
+def test_parse_examples(message, expected):
+    """モジュールの docstring に挙げた形式のメッセージを解析できる"""
+    assert parse_trade_message(message) == expected
+
+
+@pytest.mark.parametrize("message", [
+    "",
+    "トヨタの決算が良かった",        # 取引キーワードなし
+    "トヨタを購入",                  # 価格なし
+    "東京で2500円で購入",            # 略称として登録していない語
+    "9999 2500円 購入",              # 監視対象外のコード
+])
+def test_parse_rejects(message):
+    """取引として解釈できないメッセージは None を返す"""
+    assert parse_trade_message(message) is None
+
+
+def _random_message(rng: random.Random) -> str:
+    """銘柄名・略称・コード・価格・株数・キーワードを組み合わせたメッセージを作る"""
+    names = list(WATCHLIST.values()) + [a for aliases in WATCHLIST_ALIASES.values() for a in aliases]
+    codes = [t for t in WATCHLIST] + [t.replace(".T", "") for t in WATCHLIST] + ["9999", "1234.T"]
+    pieces = [
+        rng.choice(names + codes + ["東京", "三菱", "トヨ", "日本", ""]),
+        rng.choice(["2500円", "2,500円", "¥2500", "￥ 1,850.5", "@1800", "0円", "12.5 円", ""]),
+        rng.choice(["100株", "5 株", "3かぶ", "200", ""]),
+        rng.choice(["購入", "購入した", "買い", "買った", "売却", "売却した", "売り", "売った",
+                    "売買", "買い増し", "売る", ""]),
+        rng.choice(["の株を", "で", "を", "今日", "成行", ""]),
+    ]
+    if rng.random() < 0.3:
+        pieces.append(rng.choice(names + codes))
+    rng.shuffle(pieces)
+    return rng.choice(["", " ", "、"]).join(pieces)
+
+
+def test_matches_reference_parser():
+    """ランダムなメッセージで、変更前の実装と同じ解析結果になる"""
+    rng = random.Random(0)
+    for _ in range(5000):
+        message = _random_message(rng)
+        assert parse_trade_message(message) == reference_trade_parser.parse_trade_message(message), message
@@ -10,28 +10,87 @@ Discordチャンネルのメッセージを読み取り、取引指示を解析
   - "三菱UFJ 1850円 200株 購入"
 """
 import re
+import os
 import logging
+import orjson
 import requests
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from config import WATCHLIST
+from config import WATCHLIST, WATCHLIST_ALIASES, PROCESSED_MESSAGES_FILE
 
 logger = logging.getLogger(__name__)
 
+# 処理済みメッセージIDの保持件数（古いものから破棄）
+PROCESSED_MESSAGES_LIMIT = 500
+
 # ティッカー→名前 と 名前→ティッカー の両方向マッピングを構築
 NAME_TO_TICKER = {}
 TICKER_SHORT_TO_FULL = {}
 for ticker, name in WATCHLIST.items():
     NAME_TO_TICKER[name] = ticker
-    # 短縮名も対応（例: "トヨタ" → "トヨタ自動車"）
-    # 先頭2〜4文字でもマッチ
-    for length in range(2, len(name) + 1):
-        short_name = name[:length]
-        if short_name not in NAME_TO_TICKER:
-            NAME_TO_TICKER[short_name] = ticker
     # ティッカー番号のみでもマッチ（例: "7203" → "7203.T"）
     short_ticker = ticker.replace(".T", "")
     TICKER_SHORT_TO_FULL[short_ticker] = ticker
     TICKER_SHORT_TO_FULL[ticker] = ticker
+# 略称も対応（例: "トヨタ" → "トヨタ自動車"）。先頭数文字の一致では
+# "東京" や "三菱" のような語で別の銘柄に誤マッチするため、明示した略称のみ使う
+for ticker, aliases in WATCHLIST_ALIASES.items():
+    for alias in aliases:
+        NAME_TO_TICKER.setdefault(alias, ticker)
+
+# 取引タイプの判定キーワード（買いを優先）
+# "購入した"・"売却した" は "購入"・"売却" に含まれるため別に持たない
+_BUY_KEYWORDS = ("購入", "買い", "買った", "買う")
+_SELL_KEYWORDS = ("売却", "売り", "売った", "売る")
+
+# 価格の抽出（"2500円", "¥2500", "2,500円" など）: 先に書いたパターンを優先
+_PRICE_RES = [
+    re.compile(r'[¥￥]?\s*([\d,]+(?:\.\d+)?)\s*円'),
+    re.compile(r'[¥￥]\s*([\d,]+(?:\.\d+)?)'),
+    re.compile(r'@\s*([\d,]+(?:\.\d+)?)'),
+]
+# 株数の抽出（"100株", "100" など）
+_SHARES_RES = [
+    re.compile(r'(\d+)\s*株'),
+    re.compile(r'(\d+)\s*(?:株|かぶ)'),
+]
+# ティッカーコード（"7203.T", "7203" など）
+_TICKER_RE = re.compile(r'(\d{4})(?:\.T)?')
+
+# 銘柄名の照合: 長い名前を優先（同じ長さなら登録順）し、メッセージ中の全位置の一致を1回の走査で拾う
+_NAMES_BY_PRIORITY = sorted((n for n in NAME_TO_TICKER if len(n) >= 2), key=len, reverse=True)
+_NAME_RANK = {n: i for i, n in enumerate(_NAMES_BY_PRIORITY)}
+_NAME_RE = re.compile("(?=(" + "|".join(map(re.escape, _NAMES_BY_PRIORITY)) + "))")
+
+
+def _load_processed_messages() -> OrderedDict:
+    """処理済みメッセージIDを読み込む（重複処理防止用、古い順）"""
+    if os.path.exists(PROCESSED_MESSAGES_FILE):
+        try:
+            with open(PROCESSED_MESSAGES_FILE, "rb") as f:
+                return OrderedDict.fromkeys(orjson.loads(f.read())[-PROCESSED_MESSAGES_LIMIT:])
+        except (orjson.JSONDecodeError, IOError):
+            pass
+    return OrderedDict()
+
+
+def _save_processed_messages(processed_ids: OrderedDict):
+    """処理済みメッセージIDを保存（一時ファイルに書いてから置き換え、途中で落ちても壊さない）"""
+    tmp_path = PROCESSED_MESSAGES_FILE + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(list(processed_ids)))
+        os.replace(tmp_path, PROCESSED_MESSAGES_FILE)
+    except IOError as e:
+        logger.error(f"処理済みメッセージの保存に失敗: {e}")
+
+
+def _mark_processed(msg_id: str, processed_ids: OrderedDict):
+    """メッセージIDを処理済みに追加し、上限を超えた古いIDを破棄する"""
+    processed_ids[msg_id] = None
+    processed_ids.move_to_end(msg_id)
+    if len(processed_ids) > PROCESSED_MESSAGES_LIMIT:
+        processed_ids.popitem(last=False)
 
 
 def parse_trade_message(message: str) -> dict | None:
@@ -49,32 +108,18 @@ def parse_trade_message(message: str) -> dict | None:
     if not message:
         return None
 
-    # 取引タイプ判定
-    trade_type = None
-    buy_keywords = ["購入", "買い", "買った", "買う", "購入した"]
-    sell_keywords = ["売却", "売り", "売った", "売る", "売却した"]
-
-    for keyword in buy_keywords:
-        if keyword in message:
-            trade_type = "BUY"
-            break
-    if trade_type is None:
-        for keyword in sell_keywords:
-            if keyword in message:
-                trade_type = "SELL"
-                break
-    if trade_type is None:
+    # 取引タイプ判定（キーワードがなければ正規表現を使う前に打ち切る）
+    if any(keyword in message for keyword in _BUY_KEYWORDS):
+        trade_type = "BUY"
+    elif any(keyword in message for keyword in _SELL_KEYWORDS):
+        trade_type = "SELL"
+    else:
         return None  # 取引関連メッセージではない
 
-    # 価格の抽出（"2500円", "¥2500", "2,500円" など）
-    price_patterns = [
-        r'[¥￥]?\s*([\d,]+(?:\.\d+)?)\s*円',
-        r'[¥￥]\s*([\d,]+(?:\.\d+)?)',
-        r'@\s*([\d,]+(?:\.\d+)?)',
-    ]
+    # 価格の抽出
     price = None
-    for pattern in price_patterns:
-        match = re.search(pattern, message)
+    for pattern in _PRICE_RES:
+        match = pattern.search(message)
         if match:
             price = float(match.group(1).replace(",", ""))
             break
@@ -82,14 +127,10 @@ def parse_trade_message(message: str) -> dict | None:
     if price is None or price <= 0:
         return None
 
-    # 株数の抽出（"100株", "100" など）
+    # 株数の抽出
     shares = 1  # デフォルト1株（S株対応）
-    shares_patterns = [
-        r'(\d+)\s*株',
-        r'(\d+)\s*(?:株|かぶ)',
-    ]
-    for pattern in shares_patterns:
-        match = re.search(pattern, message)
+    for pattern in _SHARES_RES:
+        match = pattern.search(message)
         if match:
             shares = int(match.group(1))
             break
@@ -99,7 +140,7 @@ def parse_trade_message(message: str) -> dict | None:
     name = None
 
     # まずティッカーコードで検索（"7203.T", "7203" など）
-    ticker_match = re.search(r'(\d{4})(?:\.T)?', message)
+    ticker_match = _TICKER_RE.search(message)
     if ticker_match:
         short_ticker = ticker_match.group(1)
         if short_ticker in TICKER_SHORT_TO_FULL:
@@ -108,13 +149,12 @@ def parse_trade_message(message: str) -> dict | None:
 
     # ティッカーが見つからなければ銘柄名で検索
     if ticker is None:
-        # 長い名前から順にマッチ（部分一致を優先）
-        sorted_names = sorted(NAME_TO_TICKER.keys(), key=len, reverse=True)
-        for candidate_name in sorted_names:
-            if candidate_name in message and len(candidate_name) >= 2:
-                ticker = NAME_TO_TICKER[candidate_name]
-                name = WATCHLIST.get(ticker, ticker)
-                break
+        # 一致した中で最も長い名前を採用
+        matches = [m.group(1) for m in _NAME_RE.finditer(message)]
+        if matches:
+            candidate_name = min(matches, key=_NAME_RANK.__getitem__)
+            ticker = NAME_TO_TICKER[candidate_name]
+            name = WATCHLIST.get(ticker, ticker)
 
     if ticker is None:
         return None
@@ -164,7 +204,8 @@ def fetch_discord_messages(bot_token: str, channel_id: str,
             # Bot自身のメッセージは無視
             if msg.get("author", {}).get("bot", False):
                 continue
-            msg_time = datetime.fromisoformat(msg["timestamp"].replace("Z", "+00:00"))
+            # Python 3.11以降の fromisoformat は末尾の "Z" もそのまま解釈できる
+            msg_time = datetime.fromisoformat(msg["timestamp"])
             if msg_time >= cutoff:
                 recent_messages.append(msg)
 
@@ -189,9 +230,19 @@ def process_discord_trades(bot_token: str, channel_id: str,
         return []
 
     messages = fetch_discord_messages(bot_token, channel_id, minutes_back)
+    if not messages:
+        return []  # 新着メッセージがなければ処理済みIDの読み込みも不要
+
+    processed_ids = _load_processed_messages()
     processed_trades = []
+    dirty = False
 
     for msg in messages:
+        msg_id = msg.get("id", "")
+        # 前回の実行で処理済みのメッセージは無視（取得範囲が重なるため）
+        if msg_id in processed_ids:
+            continue
+
         content = msg.get("content", "")
         trade = parse_trade_message(content)
 
@@ -201,9 +252,14 @@ def process_discord_trades(bot_token: str, channel_id: str,
                 f"{trade['name']}({trade['ticker']}) "
                 f"¥{trade['price']:,.0f} × {trade['shares']}株"
             )
-            trade["message_id"] = msg.get("id", "")
+            trade["message_id"] = msg_id
             trade["author"] = msg.get("author", {}).get("username", "unknown")
             trade["timestamp"] = msg.get("timestamp", "")
             processed_trades.append(trade)
+            _mark_processed(msg_id, processed_ids)
+            dirty = True
 
+    # 新しく処理したメッセージがなければ書き込まない
+    if dirty:
+        _save_processed_messages(processed_ids)
     return processed_trades